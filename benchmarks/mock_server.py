@@ -0,0 +1,243 @@
+"""
+A local stand-in for a Serv-U MFT server that implements the endpoints Client uses, for benchmarking.
+
+Run it on its own with ``python -m benchmarks.mock_server --port 8080 --latency 0.05`` or start it from code with
+MockServer(...).start().
+"""
+import argparse
+import http.server
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit, parse_qs, quote
+
+
+class MockServer:
+    """A threaded HTTP server that imitates Serv-U MFT with a configurable latency and bandwidth."""
+
+    def __init__(self, username: str = "user", password: str = "password", shares: int = 1000,
+                 latency: float = 0.0, bandwidth: float = None, host: str = "127.0.0.1", port: int = 0,
+                 newest_first: bool = False):
+        """
+        :param username: The username the server accepts.
+        :param password: The password the server accepts.
+        :param shares: How many file shares ListFileShares reports.
+        :param latency: Seconds to wait before answering each request.
+        :param bandwidth: Optionally, the most bytes per second to read or write per connection.
+        :param host: The interface to listen on.
+        :param port: The port to listen on; 0 picks a free one.
+        :param newest_first: Whether ListFileShares lists the newest file shares first instead of the oldest.
+        """
+        self.username = username
+        self.password = password
+        self.shares = shares
+        self.newest_first = newest_first
+        # Notification status codes that override the default for the file share at a position.
+        self.statuses = {}
+        # StartPos values whose ListFileShares page is answered with a server error.
+        self.failing_pages = set()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.sessions = set()
+        self.bytes_uploaded = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = http.server.ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self.url = f"http://{host}:{self._httpd.server_address[1]}/"
+
+    def start(self):
+        """Starts serving on a background thread."""
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops serving."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def expire_sessions(self):
+        """Forgets every login, as if they had all timed out."""
+        with self._lock:
+            self.sessions.clear()
+
+    def share_xml(self, position: int) -> bytes:
+        """The ListFileShares entry for the file share at the given position."""
+        created = 1600000000 + position * 60
+        return (f"<share><ShareToken>share{position:08d}</ShareToken><HasPassword>{position % 2}</HasPassword>"
+                f"<DateCreated>{created}</DateCreated><MsgSubject>Report%20{position}</MsgSubject>"
+                f"<FirstRecipient>recipient{position}@example.com</FirstRecipient><NumRecipients>1</NumRecipients>"
+                f"<Notification><NotificationStatus>{self.statuses.get(position, position % 6)}</NotificationStatus>"
+                f"</Notification>"
+                f"<TotalFileSize>{position * 1024}</TotalFileSize><NumFiles>{position % 5 + 1}</NumFiles>"
+                f"<DateExpiration>{created + 30 * 86400}</DateExpiration></share>").encode('utf-8')
+
+    def share_details_html(self, share_token: str) -> bytes:
+        """The ShareDetails.htm page for a file share."""
+        return (f'<html><head><script>var HISTORY_ITEMS_PER_PAGE=10;'
+                f'g_sShareSubject=decodeURIComponent("Report%20for%20{share_token}");'
+                f'g_sShareComment=decodeURIComponent("Monthly%20numbers");'
+                f'g_sShareGuest=decodeURIComponent("recipient%40example.com");'
+                f'g_sPassword="";g_sShareStatus=3;g_sShareDate=GetLongDateTime(1600000000);'
+                f'g_nShareExpires=parseInt("1602592000");g_sShareOwnerName=decodeURIComponent("{self.username}");'
+                f'var sDLIconPath="/icons/download.png";</script></head><body></body></html>').encode('utf-8')
+
+    def _throttle(self, size: int):
+        if self.bandwidth:
+            time.sleep(size / self.bandwidth)
+
+
+def _handler(server: MockServer):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, so Nagle's algorithm would hold the body back for a delayed ACK.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, body: bytes = b"", status: int = 200, headers: tuple = ()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for start in range(0, len(body), 64 * 1024):
+                chunk = body[start:start + 64 * 1024]
+                server._throttle(len(chunk))
+                self.wfile.write(chunk)
+
+        def _read_body(self, keep: bool = True) -> bytes:
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                return self._read_chunked_body(keep)
+            remaining = int(self.headers.get("Content-Length") or 0)
+            self.body_size = remaining
+            body = []
+            while remaining:
+                chunk = self.rfile.read(min(remaining, 64 * 1024))
+                if not chunk:
+                    break
+                server._throttle(len(chunk))
+                remaining -= len(chunk)
+                if keep:
+                    body.append(chunk)
+            return b"".join(body)
+
+        def _read_chunked_body(self, keep: bool) -> bytes:
+            self.body_size = 0
+            body = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                chunk = self.rfile.read(size)
+                self.rfile.readline()
+                server._throttle(size)
+                self.body_size += size
+                if keep:
+                    body.append(chunk)
+            return b"".join(body)
+
+        def _session(self) -> str:
+            for cookie in self.headers.get("Cookie", "").split(";"):
+                name, _, value = cookie.strip().partition("=")
+                if name == "Killmenothing":
+                    return value
+
+        def _authorized(self) -> bool:
+            return self._session() in server.sessions
+
+        def _start(self):
+            with server._lock:
+                server.requests += 1
+            time.sleep(server.latency)
+            parts = urlsplit(self.path)
+            return parts.path, {name: values[0] for name, values in parse_qs(parts.query).items()}
+
+        def do_GET(self):
+            path, query = self._start()
+            if path == "/":
+                return self._reply(b"<html><body>Serv-U</body></html>",
+                                   headers=[("Set-Cookie", f"Killmenothing={uuid.uuid4().hex}; Path=/")])
+            if not self._authorized():
+                return self._reply(status=302, headers=[("Location", "/")])
+            if path == "/Web%20Client/Share/Console.htm":
+                return self._reply(b"<html><body>Console</body></html>")
+            if path == "/Web%20Client/Share/ShareDetails.htm":
+                return self._reply(server.share_details_html(query.get("ShareToken", "")))
+            self._reply(status=404)
+
+        def do_POST(self):
+            path, query = self._start()
+            if path == "/Web%20Client/Login.xml":
+                form = {name: values[0] for name, values in parse_qs(self._read_body().decode('utf-8')).items()}
+                session = self._session()
+                if not session or form.get("user") != server.username or form.get("pword") != server.password:
+                    return self._reply(b"<response><result>1</result></response>")
+                with server._lock:
+                    server.sessions.add(session)
+                return self._reply(f"<response><result>0</result><CsrfToken>{uuid.uuid4().hex}</CsrfToken>"
+                                   f"</response>".encode('utf-8'))
+
+            uploading = path == "/Web%20Client/Share/MultipleFileUploadResult.htm"
+            body = self._read_body(keep=not uploading)
+            if not self._authorized():
+                return self._reply(status=302, headers=[("Location", "/")])
+
+            if path == "/Web%20Client/Share/CreateFileShare.xml":
+                token = uuid.uuid4().hex
+                url = quote(f"{server.url}?shareToken={token}", safe="")
+                return self._reply(f"<response><ShareURL>{url}</ShareURL><ShareToken>{token}</ShareToken>"
+                                   f"</response>".encode('utf-8'))
+            if uploading:
+                with server._lock:
+                    server.bytes_uploaded += self.body_size
+                return self._reply(b"<html><body>Upload complete</body></html>")
+            if path == "/Web%20Client/Share/ListFileShares.xml":
+                form = {name: values[0] for name, values in parse_qs(body.decode('utf-8')).items()}
+                start = int(form.get("StartPos", 0))
+                if start in server.failing_pages:
+                    return self._reply(status=500)
+                end = min(start + int(form.get("NumShares", 10)), server.shares)
+                positions = range(start, end)
+                if server.newest_first:
+                    positions = (server.shares - 1 - index for index in positions)
+                return self._reply(b"<response>" + b"".join(server.share_xml(position)
+                                                             for position in positions) + b"</response>")
+            if path in ("/", "/Web%20Client/Result.xml"):
+                return self._reply(b"<response><result>0</result><ResultText>OK</ResultText></response>")
+            self._reply(status=404)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--username", default="user")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--shares", type=int, default=1000, help="How many file shares to list.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response.")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Bytes per second per connection.")
+    parser.add_argument("--newest-first", action="store_true", help="List the newest file shares first.")
+    args = parser.parse_args()
+
+    server = MockServer(username=args.username, password=args.password, shares=args.shares, latency=args.latency,
+                        bandwidth=args.bandwidth, host=args.host, port=args.port, newest_first=args.newest_first)
+    print(f"Serving a mock MFT server at {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
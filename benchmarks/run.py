@@ -0,0 +1,165 @@
+"""
+Benchmarks the client against the local mock MFT server.
+
+Run it from the repository root with ``python -m benchmarks.run``. Every benchmark runs --repeat times and reports the
+best and median; pass --json to save the results for comparing before and after a change.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import warnings
+
+from mft import Client
+
+from .mock_server import MockServer
+
+
+def _time(fn, repeat: int) -> [float]:
+    """Runs fn repeat times and returns how many seconds each run took."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _client(server: MockServer) -> Client:
+    client = Client(server.url)
+    client.login(username=server.username, password=server.password)
+    return client
+
+
+def _write_file(directory: str, name: str, size: int) -> str:
+    path = os.path.join(directory, name)
+    block = bytes(range(256)) * 4096
+    with open(path, 'wb') as f:
+        for start in range(0, size, len(block)):
+            f.write(block[:size - start])
+    return path
+
+
+def bench_login(server, args):
+    timings = _time(lambda: _client(server), args.repeat)
+    return timings, 1, "logins"
+
+
+def bench_create_share(server, args):
+    client = _client(server)
+    count = args.shares_per_run
+
+    def run():
+        for _ in range(count):
+            client.create_file_share(share_type=Client.ShareType.request)
+    return _time(run, args.repeat), count, "shares"
+
+
+def bench_create_shares_batch(server, args):
+    client = _client(server)
+    count = args.shares_per_run
+    jobs = [{'share_type': Client.ShareType.request} for _ in range(count)]
+
+    def run():
+        for result in client.create_file_shares(jobs):
+            if result.error:
+                raise result.error
+    return _time(run, args.repeat), count, "shares"
+
+
+def bench_upload_small(server, args, max_workers: int = 1):
+    client = _client(server)
+    with tempfile.TemporaryDirectory() as directory:
+        files = [_write_file(directory, f"small{index}.bin", args.small_kb * 1024) for index in range(args.small_files)]
+        timings = _time(lambda: client.create_file_share(share_type=Client.ShareType.send, files=files,
+                                                         max_workers=max_workers), args.repeat)
+    return timings, args.small_files * args.small_kb * 1024, "bytes"
+
+
+def bench_upload_small_parallel(server, args):
+    return bench_upload_small(server, args, max_workers=8)
+
+
+def bench_upload_large(server, args):
+    client = _client(server)
+    with tempfile.TemporaryDirectory() as directory:
+        path = _write_file(directory, "large.bin", args.large_mb * 1024 * 1024)
+        timings = _time(lambda: client.create_file_share(share_type=Client.ShareType.send, files=[path]), args.repeat)
+    return timings, args.large_mb * 1024 * 1024, "bytes"
+
+
+def bench_list_file_shares(server, args):
+    client = _client(server)
+    return _time(lambda: client.list_file_shares(count=server.shares), args.repeat), server.shares, "shares"
+
+
+def bench_iter_file_shares(server, args):
+    client = _client(server)
+    return (_time(lambda: sum(1 for _ in client.iter_file_shares(page_size=args.page_size)), args.repeat),
+            server.shares, "shares")
+
+
+def bench_get_file_share_infos(server, args):
+    client = _client(server)
+    tokens = [f"share{position:08d}" for position in range(args.shares_per_run)]
+    return _time(lambda: client.get_file_share_infos(tokens, use_cache=False), args.repeat), len(tokens), "shares"
+
+
+BENCHMARKS = {
+    'login': bench_login,
+    'create_share': bench_create_share,
+    'create_shares_batch': bench_create_shares_batch,
+    'upload_small': bench_upload_small,
+    'upload_small_parallel': bench_upload_small_parallel,
+    'upload_large': bench_upload_large,
+    'list_file_shares': bench_list_file_shares,
+    'iter_file_shares': bench_iter_file_shares,
+    'get_file_share_infos': bench_get_file_share_infos,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help=f"Which benchmarks to run, out of {', '.join(BENCHMARKS)}; all of them by default.")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times to run each benchmark.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the server waits before each response.")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Server bytes per second per connection.")
+    parser.add_argument("--shares", type=int, default=10000, help="How many file shares the server lists.")
+    parser.add_argument("--page-size", type=int, default=500, help="Page size for iter_file_shares.")
+    parser.add_argument("--shares-per-run", type=int, default=50, help="File shares created per run.")
+    parser.add_argument("--small-files", type=int, default=40, help="Files per run of the small upload benchmarks.")
+    parser.add_argument("--small-kb", type=int, default=16, help="Size of each small file in KiB.")
+    parser.add_argument("--large-mb", type=int, default=256, help="Size of the large file in MiB.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    warnings.simplefilter("ignore")
+
+    results = {}
+    with MockServer(shares=args.shares, latency=args.latency, bandwidth=args.bandwidth) as server:
+        print(f"{'benchmark':<24}{'best s':>10}{'median s':>10}{'rate':>22}")
+        for name in args.benchmarks or BENCHMARKS:
+            timings, amount, unit = BENCHMARKS[name](server, args)
+            best, median = min(timings), statistics.median(timings)
+            rate = amount / median
+            if unit == "bytes":
+                rate_text = f"{rate / 1024 / 1024:,.1f} MiB/s"
+            else:
+                rate_text = f"{rate:,.1f} {unit}/s"
+            print(f"{name:<24}{best:>10.4f}{median:>10.4f}{rate_text:>22}")
+            results[name] = {'timings': timings, 'best': best, 'median': median, 'amount': amount, 'unit': unit,
+                             'rate': rate}
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': platform.python_version(), 'settings': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Lets the tests import the benchmarks package, e.g. its mock MFT server, when pytest runs from the repository root.
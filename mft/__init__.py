@@ -1,4 +1,10 @@
-from .client import Client
+from .client import Client, FileShare, UploadError
+from .batch import RateLimiter, ShareJobResult
+from .cache import TTLCache
+from .metrics import Instrumentation, MetricsRecorder, RequestEvent
+from .session_store import SessionStore, FileSessionStore
+from .async_client import AsyncClient
+from .index import ShareIndex
 
 __version__ = '0.0.8'
 __author__ = "Joe Aguilar"
\ No newline at end of file
@@ -0,0 +1,237 @@
+import asyncio
+import time
+import warnings
+from datetime import datetime, timedelta
+from urllib.parse import unquote, urljoin, quote
+
+from .client import Client, UploadError, _check_files, _parse_xml, _file_share_payload, _parse_file_share
+from .upload import MultipartFileStream, source_label
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncClient:
+    """An asyncio counterpart to Client, built on httpx. Install it with ``pip install mft[async]``."""
+    ShareType = Client.ShareType
+
+    def __init__(self, host: str, max_connections: int = 100):
+        """
+        Creates an asyncio client for SolarWinds Serv-U Managed File Transfer (MFT).
+        :param host: Usually the URL to the login page.
+        :param max_connections: The most connections to keep open to the host at once.
+        """
+        if httpx is None:
+            raise ImportError("AsyncClient requires httpx. Install it with `pip install mft[async]`.")
+        self.host = host
+        self.session = httpx.AsyncClient(headers=Client._HEADERS, verify=False, follow_redirects=False,
+                                         limits=httpx.Limits(max_connections=max_connections,
+                                                             max_keepalive_connections=max_connections))
+        self.csrf_token = None
+        self._login_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """Closes the connections to MFT."""
+        await self.session.aclose()
+
+    async def login(self, username: str, password: str):
+        """
+        Logs into MFT.
+        :param username: Your username.
+        :param password: Your password.
+        """
+        self.credentials = {
+            'user': username,
+            'pword': password,
+            'language': 'en,US',
+            'viewshare': ''
+        }
+        self.connection_status = await self._login()
+
+    async def _login(self):
+        response = await self.session.get(self.host, follow_redirects=True)
+        if response.status_code != 200:
+            return False
+
+        params = {
+            'Command': 'Login',
+            'Sync': int(time.time())
+        }
+        response = await self.session.post(urljoin(self.host, fr"Web%20Client/Login.xml"),
+                                           data=self.credentials, params=params)
+        root = _parse_xml(response.text)
+        if root.find("./result").text != '0':
+            raise ConnectionRefusedError("Invalid credentials.")
+
+        self.csrf_token = root.find('./CsrfToken').text
+        self.session.headers.update({'X-CSRF-Token': self.csrf_token})
+        response = await self.session.get(urljoin(self.host, r"Web%20Client/Share/Console.htm"), follow_redirects=True)
+        return response.status_code == 200
+
+    async def _relogin(self, stale_csrf_token: str):
+        """Logs in again after the server rejected the session, unless another task already has."""
+        async with self._login_lock:
+            if self.csrf_token != stale_csrf_token:
+                return
+            self.session.cookies.clear()
+            self.connection_status = await self._login()
+
+    async def _request(self, method: str, url: str, body: MultipartFileStream = None, **kwargs):
+        """
+        Sends a request, logging in again and retrying once if the server rejects the session, like Client._request.
+        :param body: Optionally, an upload to stream as the request's content. It is rewound if the request is retried.
+        :raises ConnectionRefusedError: If the server still rejects the session after logging in again.
+        """
+        csrf_token = self.csrf_token
+        for attempt in range(2):
+            if body is not None:
+                if attempt:
+                    body.rewind()
+                kwargs['content'] = body.__aiter__()
+            response = await self.session.request(method, url, **kwargs)
+            if not Client._is_rejected(response):
+                response.raise_for_status()
+                return response
+            await response.aclose()
+            if attempt:
+                break
+            await self._relogin(stale_csrf_token=csrf_token)
+            if 'CsrfToken' in kwargs.get('params', {}):
+                kwargs['params']['CsrfToken'] = self.csrf_token
+        raise ConnectionRefusedError("MFT rejected the session even after logging in again.")
+
+    async def create_file_share(self, share_type: ShareType, files: list = None,
+                                expiry: int = int((datetime.now() + timedelta(days=30)).timestamp()),
+                                password: str = None, subject: str = "File Share", comments: str = None,
+                                notify_when_downloaded: bool = True, recipient_addrs: [str] = None,
+                                max_workers: int = 1, chunk_size: int = 1024 * 1024, progress=None) -> str:
+        """
+        Uploads the files to the MFT server and returns the URL to be shared with the recipient.
+        See Client.create_file_share for the parameters.
+        """
+        if share_type is AsyncClient.ShareType.send:
+            _check_files(files)
+        elif share_type is AsyncClient.ShareType.request and files:
+            warnings.warn("You are requesting files but submitted files. They will be ignored.")
+
+        data = await self._create_file_share(share_type=share_type.value, subject=subject, comments=comments,
+                                             expiry=expiry, password=password,
+                                             notify_when_downloaded=notify_when_downloaded,
+                                             recipient_addrs=recipient_addrs)
+        if share_type is AsyncClient.ShareType.send:
+            try:
+                await self._upload_files(files=files, token=data['token'], max_workers=max_workers,
+                                         chunk_size=chunk_size, progress=progress)
+            except UploadError as exc:
+                exc.token, exc.url = data['token'], data['url']
+                raise
+
+        if recipient_addrs:
+            await self.send_file_share_invitation_email(share_token=data['token'], password=password)
+        return data['url']
+
+    async def _create_file_share(self, share_type: int, subject: str, comments: str, expiry: int,
+                                 recipient_addrs: [str], notify_when_downloaded: bool, password: str = None):
+        """Creates a file share in MFT and returns the url and token."""
+        payload = _file_share_payload(share_type=share_type, sender=self.credentials['user'], subject=subject,
+                                      comments=comments, expiry=expiry, recipient_addrs=recipient_addrs,
+                                      notify_when_downloaded=notify_when_downloaded, password=password)
+        params = {
+            'Command': 'CreateFileShare'
+        }
+
+        response = await self._request('POST', urljoin(self.host, r"Web%20Client/Share/CreateFileShare.xml"),
+                                       data=payload, params=params)
+        root = _parse_xml(response.text)
+        return {"url": unquote(root.find("./ShareURL").text),  # ShareURL Encoded
+                "token": root.find("./ShareToken").text}
+
+    async def _upload_files(self, files: list, token: str, max_workers: int = 1, chunk_size: int = 1024 * 1024,
+                            progress=None):
+        """
+        Uploads the files to the previously created file share, at most max_workers at a time.
+        :raises UploadError: If any file failed to upload. The remaining files are still uploaded.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def upload(index, file):
+            async with semaphore:
+                await self._upload_file(file=file, token=token, transfer_id=index + 1, chunk_size=chunk_size,
+                                        progress=progress)
+
+        results = await asyncio.gather(*(upload(index, file) for index, file in enumerate(files)),
+                                       return_exceptions=True)
+        failures = {source_label(file): result for file, result in zip(files, results)
+                    if isinstance(result, Exception)}
+        if failures:
+            raise UploadError(failures)
+
+    async def _upload_file(self, file, token: str, transfer_id: int, chunk_size: int = 1024 * 1024,
+                           progress=None):
+        """Streams a single file, directory or in-memory source to the previously created file share."""
+        callback = (lambda sent, total: progress(file, sent, total)) if progress else None
+        with MultipartFileStream(file, chunk_size=chunk_size, progress=callback) as body:
+            params = {
+                'Command': 'UploadFileShare',
+                'ShareToken': token,
+                'IsVirtual': 0,
+                'CsrfToken': self.csrf_token,
+                'TransferID': transfer_id,
+                'File': quote(body.filename)
+            }
+            headers = {'Content-Type': body.content_type}
+            if body.len is not None:
+                headers['Content-Length'] = str(body.len)
+            await self._request('POST', urljoin(self.host, fr"Web%20Client/Share/MultipleFileUploadResult.htm"),
+                                body=body, headers=headers, params=params)
+
+    async def cancel_file_share(self, share_token: str):
+        """Invalidates a file share."""
+        params = {
+            'Command': 'DeleteFileShare',
+            'ShareToken': share_token,
+            'Sync': int(time.time())
+        }
+        response = await self._request('POST', urljoin(self.host, fr"Web%20Client/Result.xml"), params=params)
+        root = _parse_xml(response.text)
+        return root.find("./ResultText").text
+
+    async def list_file_shares(self, count: int = 10):
+        """
+        Lists the number of file shares specified.
+        :param count: Number of file shares to return. Default is 10.
+        :return: A list of file share datum.
+        """
+        payload = {
+            'ShareType': 1,
+            'NumShares': count,
+            'StartPos': 0
+        }
+        params = {
+            'Command': 'ListFileShares',
+            'Sync': int(time.time())
+        }
+        response = await self._request('POST', urljoin(self.host, fr"Web%20Client/Share/ListFileShares.xml"),
+                                       data=payload, params=params)
+        root = _parse_xml(response.text)
+        return [_parse_file_share(datum) for datum in root.findall("./share")]
+
+    async def send_file_share_invitation_email(self, share_token: str, password: str = None):
+        """Sends an email to the recipients with a link to the file share."""
+        params = {
+            'Command': 'SendFileShareInvitation',
+            'ShareToken': share_token,
+            'IncludesPasswordInEmail': 1 if password else 0,
+            'Password': password if password else ""
+        }
+        response = await self._request('POST', self.host, params=params)
+        root = _parse_xml(response.text)
+        return root.find("./ResultText").text
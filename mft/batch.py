@@ -0,0 +1,93 @@
+import random
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError
+
+ShareJobResult = namedtuple('ShareJobResult', ['index', 'job', 'url', 'token', 'error'])
+ShareJobResult.__doc__ = """The outcome of one job of a batch. error is None if the file share was created, uploaded and sent."""
+
+
+class RateLimiter:
+    """A thread safe token bucket that spaces calls out to at most a given rate."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        :param rate: How many calls to allow per second.
+        :param burst: How many calls may be made back to back after a quiet period.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Whether an error is worth retrying: a dropped connection, a timeout, throttling or a server error."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def _is_unsent(exc: Exception) -> bool:
+    """
+    Whether a request that isn't safe to repeat can be retried: MFT never received it, or MFT throttled it.
+    A read timeout or server error may come after MFT already acted, so retrying those could duplicate the work.
+    """
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError) and exc.args:
+        # Failing to open the connection surfaces as a MaxRetryError whose reason is a NewConnectionError.
+        return isinstance(getattr(exc.args[0], 'reason', None), ConnectTimeoutError)
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429
+    return False
+
+
+def _retry_delay(exc: Exception, attempt: int, backoff: float) -> float:
+    """Honours the server's Retry-After header if it sent one, otherwise backs off exponentially with jitter."""
+    response = getattr(exc, 'response', None)
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+
+
+def call_with_retries(fn, limiter: RateLimiter, retries: int, backoff: float, on_retry=None,
+                      retry_on=_is_transient, **kwargs):
+    """
+    Calls fn, waiting on the rate limiter before each attempt and retrying transient errors.
+    :param on_retry: An optional callable taking (exception, attempt), called before each retry.
+    :param retry_on: A callable taking an exception and returning whether it is worth retrying.
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.wait()
+        try:
+            return fn(**kwargs)
+        except Exception as exc:
+            if attempt >= retries or not retry_on(exc):
+                raise
+            if on_retry:
+                on_retry(exc, attempt + 1)
+            time.sleep(_retry_delay(exc, attempt, backoff))
+            attempt += 1
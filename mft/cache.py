@@ -0,0 +1,52 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A thread safe cache that forgets entries after a time to live and evicts the least recently used when full."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        """
+        :param maxsize: The most entries to keep.
+        :param ttl: How many seconds an entry stays fresh.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Returns the fresh entry for the key, or default if there isn't one."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Stores an entry, evicting the least recently used entry if the cache is full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Removes the entry for the key and returns it, or default if there isn't one."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
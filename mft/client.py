@@ -1,32 +1,181 @@
+import copy
 import time
 from lxml import etree
-from collections import deque
+from collections import deque, namedtuple
 from datetime import datetime, timedelta
-from urllib.parse import urlsplit, unquote, urljoin, quote
+from urllib.parse import urlsplit, unquote, urljoin, quote, parse_qs
 import urllib3
-import os
+import re
 import enum
 import warnings
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from .batch import RateLimiter, ShareJobResult, call_with_retries, _is_transient, _is_unsent
+from .cache import TTLCache
+from .metrics import Instrumentation, RequestEvent
+from .session_store import SessionStore
+from .upload import MultipartFileStream, source_label, source_name, source_rewinder
+
+
+class UploadError(Exception):
+    """Raised when one or more files could not be uploaded to a file share."""
+
+    def __init__(self, failures: dict, token: str = None, url: str = None):
+        """
+        :param failures: A mapping of each file that failed to the exception raised while uploading it.
+        :param token: The share token of the file share the files were uploaded to, to cancel it or retry the failures.
+        :param url: The link to the file share.
+        """
+        self.failures = failures
+        self.token = token
+        self.url = url
+        super().__init__("Failed to upload {} file(s): {}".format(
+            len(failures), ", ".join(f"{file} ({exc})" for file, exc in failures.items())))
+
+
+_NOTIFICATION_STATUS = {
+    '0': 'Pending',
+    '1': 'Sent',
+    '2': 'Error Sending',
+    '3': 'Downloaded',
+    '4': 'Received',
+    '5': 'Expired'
+}
+
+
+def _check_files(files: list):
+    """Raises before a file share is created if the files aren't a list of sources that can be uploaded."""
+    if not files or not isinstance(files, list):
+        raise AttributeError("If sending files, the files parameter must contain a list of files.")
+    for file in files:
+        source_name(file)
+
+
+def _parse_xml(text: str):
+    """Parses an XML response from MFT."""
+    return etree.fromstring(text.encode('utf-8'), parser=etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8'))
+
+
+def _file_share_payload(share_type: int, sender: str, subject: str, comments: str, expiry: int, recipient_addrs: [str],
+                        notify_when_downloaded: bool, password: str = None) -> dict:
+    """Builds the form data for the CreateFileShare command."""
+    return {
+        "ShareType": share_type,
+        "RecipientEmailAddress": ";".join(recipient_addrs) if recipient_addrs else "",
+        "SenderName": sender,
+        "SenderEmail": sender,
+        "NotifyUserOnGuestTransfer": 1 if notify_when_downloaded else 0,
+        "SenderCarbonCopy": 0,
+        "EmailSubject": subject,
+        "EmailBody": "" if not comments else comments,
+        "ExpirationTimestamp": expiry,
+        "PasswordIsSet": 0 if not password else 1,
+        "Password": '' if not password else password,
+        "IncludePasswordInEmail": 0,
+        "MaxFileSize": 0
+    }
+
+
+def _parse_file_share(datum) -> dict:
+    """Converts a share element of a ListFileShares response into a file share datum."""
+    return {
+        "share_token": datum.find("./ShareToken").text,
+        "has_password": True if datum.find("./HasPassword").text == '1' else False,
+        "date_created": datetime.fromtimestamp(int(datum.find("./DateCreated").text)).strftime("%m/%d/%Y"),
+        "message_subject": unquote(datum.find("./MsgSubject").text),
+        "first_recipient": datum.find("./FirstRecipient").text,
+        "number_of_recipients": datum.find("./NumRecipients").text,
+        "notification_status": _NOTIFICATION_STATUS[datum.find(".//NotificationStatus").text],
+        "total_file_size": datum.find("./TotalFileSize").text,
+        "number_of_files": datum.find("./NumFiles").text,
+        "date_of_expiration": datetime.fromtimestamp(int(datum.find("./DateExpiration").text)).strftime("%m/%d/%Y")
+    }
+
+
+FileShare = namedtuple('FileShare', ['share_token', 'has_password', 'date_created', 'message_subject',
+                                     'first_recipient', 'number_of_recipients', 'notification_status',
+                                     'total_file_size', 'number_of_files', 'date_of_expiration'])
+FileShare.__doc__ = """A file share as listed by MFT. Dates are left as Unix timestamps."""
+
+
+def _parse_file_share_record(datum) -> FileShare:
+    """Converts a share element of a ListFileShares response into a FileShare."""
+    return FileShare(share_token=datum.findtext("./ShareToken"),
+                     has_password=datum.findtext("./HasPassword") == '1',
+                     date_created=int(datum.findtext("./DateCreated")),
+                     message_subject=unquote(datum.findtext("./MsgSubject") or ""),
+                     first_recipient=datum.findtext("./FirstRecipient"),
+                     number_of_recipients=int(datum.findtext("./NumRecipients")),
+                     notification_status=_NOTIFICATION_STATUS[datum.findtext(".//NotificationStatus")],
+                     total_file_size=int(datum.findtext("./TotalFileSize")),
+                     number_of_files=int(datum.findtext("./NumFiles")),
+                     date_of_expiration=int(datum.findtext("./DateExpiration")))
+
+
+# ShareDetails.htm sets the share's details as g_ JavaScript variables, so a single scan over the page with one
+# pattern picks out every value.
+_SHARE_DETAILS_PATTERN = re.compile(
+    r'\b(?P<name>g_\w+)=(?:decodeURIComponent\("(?P<encoded>[^"]*)"\)|GetLongDateTime\((?P<timestamp>\d+)\)'
+    r'|parseInt\("(?P<integer>\d+)"\)|"(?P<string>[^"]*)"|(?P<number>\d+))')
+
+
+def _parse_share_details(html: str, share_url: str) -> dict:
+    """Converts a ShareDetails.htm page into the file share's details."""
+    # TODO: The page also lists the files in sharerow divs, but their layout hasn't been checked against a real page.
+    values = {}
+    for match in _SHARE_DETAILS_PATTERN.finditer(html):
+        if match.group('encoded') is not None:
+            values[match.group('name')] = unquote(match.group('encoded'))
+        elif match.group('string') is not None:
+            values[match.group('name')] = match.group('string')
+        else:
+            number = match.group('timestamp') or match.group('integer') or match.group('number')
+            values[match.group('name')] = int(number)
+
+    if 'g_sShareSubject' not in values:
+        raise ValueError(f"No file share details were found at {share_url}.")
+    return {
+        'share_date': datetime.fromtimestamp(values['g_sShareDate']) if 'g_sShareDate' in values else None,
+        'subject': values['g_sShareSubject'],
+        'comments': values.get('g_sShareComment') or "No comments added",
+        'recipients': values.get('g_sShareGuest') or "Undisclosed recipients",
+        'share_status': _NOTIFICATION_STATUS.get(str(values.get('g_sShareStatus'))),
+        'password_protected': bool(values.get('g_sPassword')),
+        'expire_date': datetime.fromtimestamp(values['g_nShareExpires']) if 'g_nShareExpires' in values else None,
+        'share_owner': values.get('g_sShareOwnerName'),
+        'share_url': share_url
+    }
 
 
 class Client:
     _HEADERS = {
         'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/70.0.3538.77 Safari/537.36"}
 
-    def __init__(self, host: str):
+    def __init__(self, host: str, session_store: SessionStore = None, instrumentation: Instrumentation = None):
         """
         Creates a client for SolarWinds Serv-U Managed File Transfer (MFT).
         :param host: Usually the URL to the login page.
+        :param session_store: Optionally, somewhere to save the login so other processes can reuse it.
+        :param instrumentation: Optionally, something to receive timings and events for every request, such as a
+            MetricsRecorder.
         """
         self.session = requests.session()
         self.visit_history = deque(maxlen=10)
         self.host = host
+        self.session_store = session_store
+        self.instrumentation = instrumentation
+        self.share_info_cache = TTLCache(maxsize=1024, ttl=300)
+        self.csrf_token = None
+        self._login_lock = threading.Lock()
 
     def login(self, username: str, password: str):
         """
-        Logs into MFT.
+        Logs into MFT, reusing the session saved in the session store if the server still accepts it.
         :param username: Your username.
         :param password: Your password.
         """
@@ -39,19 +188,101 @@ class Client:
         self.session.verify = False
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         self.session.headers.update(self._HEADERS)
-        self.session.hooks['response'].append(self._event_hooks)
-        try:
-            self.connection_status = self._login()
-        except RecursionError as exc:
-            print(exc)
+        if self._event_hooks not in self.session.hooks['response']:
+            self.session.hooks['response'].append(self._event_hooks)
+        with self._login_lock:
+            if self._restore_session():
+                self.connection_status = True
+                return
+            try:
+                self.connection_status = self._login()
+            except RecursionError as exc:
+                print(exc)
+            else:
+                self._save_session()
 
     def _login(self):
+        self._emit('login')
         self.session.get(self.host)
         return self.visit_history[-1].status_code == 200
 
+    @property
+    def _session_key(self) -> str:
+        return f"{self.host}|{self.credentials['user']}"
+
+    def _restore_session(self) -> bool:
+        """Loads the saved session, if there is one, and returns whether the server still accepts it."""
+        if not self.session_store:
+            return False
+        state = self.session_store.load(self._session_key)
+        if not state:
+            return False
+
+        for cookie in state['cookies']:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        self.csrf_token = state['csrf_token']
+        self.session.headers.update({'X-CSRF-Token': self.csrf_token})
+        response = self.session.get(urljoin(self.host, r"Web%20Client/Share/Console.htm"), allow_redirects=False)
+        if response.status_code == 200:
+            self._emit('session_restored')
+            return True
+
+        self.session.cookies.clear()
+        self.session_store.clear(self._session_key)
+        return False
+
+    def _save_session(self):
+        if self.session_store and self.connection_status:
+            self.session_store.save(self._session_key, {
+                'cookies': [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+                            for cookie in self.session.cookies],
+                'csrf_token': self.csrf_token
+            })
+
+    def _relogin(self, stale_csrf_token: str):
+        """Logs in again after the server rejected the session, unless another thread already has."""
+        with self._login_lock:
+            if self.csrf_token != stale_csrf_token:
+                return
+            if self.session_store:
+                self.session_store.clear(self._session_key)
+            self._emit('relogin')
+            self.session.cookies.clear()
+            self.connection_status = self._login()
+            self._save_session()
+
+    @staticmethod
+    def _is_rejected(response) -> bool:
+        """Whether MFT turned the request away because the session expired, rather than answering it."""
+        if response.status_code in (401, 403):
+            return True
+        if response.is_redirect:
+            path = urlsplit(response.headers.get('Location', '')).path
+            return path in ('', '/') or 'Login' in path
+        return False
+
+    def _request(self, method: str, url: str, **kwargs):
+        """
+        Sends a request with the session, logging in again and retrying once if the server rejects the session.
+        Redirects are not followed because MFT only redirects API calls back to the login page.
+        """
+        csrf_token = self.csrf_token
+        response = self.session.request(method, url, allow_redirects=False, **kwargs)
+        if not self._is_rejected(response):
+            return response
+
+        response.close()
+        self._relogin(stale_csrf_token=csrf_token)
+        if 'CsrfToken' in kwargs.get('params', {}):
+            kwargs['params']['CsrfToken'] = self.csrf_token
+        if hasattr(kwargs.get('data'), 'rewind'):
+            kwargs['data'].rewind()
+        return self.session.request(method, url, allow_redirects=False, **kwargs)
+
     def _event_hooks(self, r, *args, **kwargs):
         scheme, netloc, path, query, frag = urlsplit(r.url)
-        print(r.url, r.status_code)
+        if self.instrumentation is not None:
+            self._record_request(r, path, query, stream=kwargs.get('stream', False))
         if path == '/' and r.status_code == 200 and not query.startswith("Command"):
             self.session.cookies.update(r.cookies.get_dict())
             params = {
@@ -60,97 +291,265 @@ class Client:
             }
             response = self.session.post(urljoin(self.host, fr"Web%20Client/Login.xml"),
                                          data=self.credentials, params=params)
-            root = etree.fromstring(response.text.encode('utf-8'),
-                                    parser=etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8'))
+            root = _parse_xml(response.text)
             if root.find("./result").text != '0':
                 raise ConnectionRefusedError("Invalid credentials.")
         elif path == '/Web%20Client/Login.xml' and r.status_code == 200:
             self.session.get(urljoin(self.host, r"Web%20Client/Share/Console.htm"))
-            root = etree.fromstring(r.text.encode('utf-8'), parser=etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8'))
+            root = _parse_xml(r.text)
             self.csrf_token = root.find('./CsrfToken').text
             self.session.headers.update({'X-CSRF-Token': self.csrf_token})
             self.session.cookies.update(r.cookies.get_dict())
+            self._emit('csrf_refresh')
         else:
             self.visit_history.append(r)
             return r
 
+    def _record_request(self, r, path: str, query: str, stream: bool = False):
+        """Reports a response to the instrumentation."""
+        command = parse_qs(query).get('Command', [path.rsplit('/', 1)[-1] or '/'])[0]
+        # Chunked bodies have no Content-Length, so count them instead: an upload stream counts what it sent, and
+        # requests reads a response that isn't streamed right after the hooks anyway.
+        bytes_sent = getattr(r.request.body, 'bytes_sent', None)
+        if bytes_sent is None:
+            bytes_sent = int(r.request.headers.get('Content-Length', 0))
+        bytes_received = r.headers.get('Content-Length')
+        if bytes_received is None:
+            bytes_received = 0 if stream else len(r.content)
+        self.instrumentation.on_request(RequestEvent(command=command, method=r.request.method, url=r.url,
+                                                     status_code=r.status_code,
+                                                     elapsed=r.elapsed.total_seconds(),
+                                                     bytes_sent=bytes_sent, bytes_received=int(bytes_received)))
+
+    def _emit(self, name: str, **fields):
+        """Reports an event to the instrumentation."""
+        if self.instrumentation is not None:
+            self.instrumentation.on_event(name, **fields)
+
     class ShareType(enum.Enum):
         request = 0
         send = 1
 
-    def create_file_share(self, share_type: ShareType, files: [str] = None,
+    def create_file_share(self, share_type: ShareType, files: list = None,
                           expiry: int = int((datetime.now() + timedelta(days=30)).timestamp()),
                           password: str = None, subject: str = "File Share", comments: str = None,
-                          notify_when_downloaded: bool = True, recipient_addrs: [str] = None) -> str:
+                          notify_when_downloaded: bool = True, recipient_addrs: [str] = None,
+                          max_workers: int = 1, chunk_size: int = 1024 * 1024, progress=None) -> str:
         """
         Uploads the files to the MFT server and returns the URL to be shared with the recipient.
         :param share_type: Whether you are requesting files or sending them.
         :param comments: A comment to attach to the file share.
         :param subject: The subject of the file share.
-        :param files: A list of the files to be shared with this link.
+        :param files: A list of what to share with this link. Each item can be a path to a file, a path to a directory
+            (sent as a zip that is built while it uploads), an open file, or a (filename, data) tuple where data is a
+            file-like object, bytes, a memoryview or a generator of bytes.
         :param expiry: A timestamp for when the files should expire; defaults to a month away.
         :param password: An optional password to protect the files.
         :param notify_when_downloaded: Defaults to true. Will send you an email when somebody has downloaded the files.
         :param recipient_addrs: Optionally, you can add recipients that Serv-U will email for you.
+        :param max_workers: How many files to upload at once. Defaults to 1, which uploads them one after another.
+        :param chunk_size: How many bytes of each file to read at a time while uploading.
+        :param progress: An optional callable taking (file, bytes_sent, total_bytes), called as each file uploads.
         :return: The link to the files.
+        :raises UploadError: If any file failed to upload. Its token and url name the file share, which still exists.
         """
-        if share_type is Client.ShareType.send and (not files or not isinstance(files, list)):
-            raise AttributeError("If sending files, the files parameter must contain a list of files.")
+        if share_type is Client.ShareType.send:
+            _check_files(files)
         elif share_type is Client.ShareType.request and files:
             warnings.warn("You are requesting files but submitted files. They will be ignored.")
 
         data = self._create_file_share(share_type=share_type.value, subject=subject, comments=comments, expiry=expiry,
                                        password=password, notify_when_downloaded=notify_when_downloaded, recipient_addrs=recipient_addrs)
         if share_type is Client.ShareType.send:
-            self._upload_files(files=files, token=data['token'])
+            try:
+                self._upload_files(files=files, token=data['token'], max_workers=max_workers,
+                                   chunk_size=chunk_size, progress=progress)
+            except UploadError as exc:
+                # The file share already exists, so tell the caller which one it is.
+                exc.token, exc.url = data['token'], data['url']
+                raise
 
         if recipient_addrs:
             self.send_file_share_invitation_email(share_token=data['token'], password=password)
         return data['url']
 
+    def create_file_shares(self, jobs: [dict], create_workers: int = 4, upload_workers: int = 4,
+                           email_workers: int = 4, requests_per_second: float = None, retries: int = 3,
+                           backoff: float = 0.5):
+        """
+        Creates many file shares at once, overlapping the create, upload and email steps of different jobs.
+        Transient errors (dropped connections, timeouts, HTTP 429 and 5xx) are retried with exponential backoff. Creating
+        a file share and sending its email aren't safe to repeat, so those are only retried if the connection couldn't
+        be opened or MFT answered 429. Uploads of sources that can't be read again, like generators, aren't retried.
+        :param jobs: The keyword arguments to create_file_share for each file share. share_type defaults to send.
+        :param create_workers: How many file shares to create at once.
+        :param upload_workers: How many file shares to upload files to at once.
+        :param email_workers: How many invitation emails to send at once.
+        :param requests_per_second: Optionally, the most requests to send to MFT per second across every step.
+        :param retries: How many times to retry a request that failed with a transient error.
+        :param backoff: How many seconds to wait before the first retry; doubles with every retry.
+        :return: A generator of ShareJobResult, in the order the jobs finish. The jobs start right away, whether or not
+            it is iterated. Closing it early cancels the jobs whose file share hasn't been created yet.
+        """
+        limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        default_expiry = int((datetime.now() + timedelta(days=30)).timestamp())
+        results = queue.Queue()
+
+        def call(fn, command: str, **kwargs):
+            return call_with_retries(fn, limiter=limiter, retries=retries, backoff=backoff,
+                                     on_retry=lambda exc, attempt: self._emit('retry', command=command, error=exc,
+                                                                              attempt=attempt),
+                                     **kwargs)
+
+        def finish(index, job, data=None, error=None):
+            results.put(ShareJobResult(index=index, job=job, url=data['url'] if data else None,
+                                       token=data['token'] if data else None, error=error))
+
+        def upload_file(rewind, **kwargs):
+            if rewind:
+                rewind()
+            self._upload_file(**kwargs)
+
+        def stage(fn):
+            """Finishes the job with whatever a stage raises, so that every job yields exactly one result."""
+            def run(index, job, data=None):
+                try:
+                    fn(index, job, data)
+                except Exception as exc:
+                    finish(index, job, data, exc)
+            return run
+
+        @stage
+        def email(index, job, data):
+            call(self.send_file_share_invitation_email, 'SendFileShareInvitation', retry_on=_is_unsent,
+                 share_token=data['token'], password=job.get('password'))
+            finish(index, job, data)
+
+        @stage
+        def upload(index, job, data):
+            failures = {}
+            for transfer_id, file in enumerate(job['files'], start=1):
+                # A retry of a source that can't be read again, like a generator, would upload an empty file.
+                rewind = source_rewinder(file)
+                try:
+                    call(upload_file, 'UploadFileShare', rewind=rewind,
+                         retry_on=_is_transient if rewind else lambda exc: False, file=file, token=data['token'],
+                         transfer_id=transfer_id, chunk_size=job.get('chunk_size', 1024 * 1024),
+                         progress=job.get('progress'))
+                except Exception as exc:
+                    failures[source_label(file)] = exc
+            if failures:
+                raise UploadError(failures, token=data['token'], url=data['url'])
+            if job.get('recipient_addrs'):
+                return email_pool.submit(email, index, job, data)
+            finish(index, job, data)
+
+        @stage
+        def create(index, job, data):
+            share_type = job.get('share_type', Client.ShareType.send)
+            if share_type is Client.ShareType.send:
+                _check_files(job.get('files'))
+            data = call(self._create_file_share, 'CreateFileShare', retry_on=_is_unsent, share_type=share_type.value,
+                        subject=job.get('subject', "File Share"), comments=job.get('comments'),
+                        expiry=job.get('expiry', default_expiry), password=job.get('password'),
+                        notify_when_downloaded=job.get('notify_when_downloaded', True),
+                        recipient_addrs=job.get('recipient_addrs'))
+            if share_type is Client.ShareType.send:
+                return upload_pool.submit(upload, index, job, data)
+            if job.get('recipient_addrs'):
+                return email_pool.submit(email, index, job, data)
+            finish(index, job, data)
+
+        jobs = list(jobs)
+        self._resize_connection_pool(create_workers + upload_workers + email_workers)
+        create_pool = ThreadPoolExecutor(max_workers=create_workers)
+        upload_pool = ThreadPoolExecutor(max_workers=upload_workers)
+        email_pool = ThreadPoolExecutor(max_workers=email_workers)
+        for index, job in enumerate(jobs):
+            create_pool.submit(create, index, job)
+
+        def collect():
+            try:
+                for _ in jobs:
+                    yield results.get()
+            finally:
+                # Each step hands its jobs on to the next, so a pool is only shut down once nothing can feed it. Only
+                # jobs that haven't created their file share yet are cancelled; the rest are uploaded and sent.
+                create_pool.shutdown(cancel_futures=True)
+                upload_pool.shutdown()
+                email_pool.shutdown()
+        return collect()
+
     def _create_file_share(self, share_type: int, subject: str, comments: str, expiry: int, recipient_addrs: [str], notify_when_downloaded: bool,
                            password: str = None):
         """Creates a file share in MFT and returns the url and token. Expiration defaults to a month from run."""
-        payload = {
-            "ShareType": share_type,
-            "RecipientEmailAddress": ";".join(recipient_addrs) if recipient_addrs else "",
-            "SenderName": self.credentials['user'],
-            "SenderEmail": self.credentials['user'],
-            "NotifyUserOnGuestTransfer": 1 if notify_when_downloaded else 0,
-            "SenderCarbonCopy": 0,
-            "EmailSubject": subject,
-            "EmailBody": "" if not comments else comments,
-            "ExpirationTimestamp": expiry,
-            "PasswordIsSet": 0 if not password else 1,
-            "Password": '' if not password else password,
-            "IncludePasswordInEmail": 0,
-            "MaxFileSize": 0
-        }
+        payload = _file_share_payload(share_type=share_type, sender=self.credentials['user'], subject=subject,
+                                      comments=comments, expiry=expiry, recipient_addrs=recipient_addrs,
+                                      notify_when_downloaded=notify_when_downloaded, password=password)
         params = {
             'Command': 'CreateFileShare'
         }
 
-        response = self.session.post(
-            urljoin(self.host, r"Web%20Client/Share/CreateFileShare.xml"), data=payload, params=params)
-        root = etree.fromstring(response.text.encode('utf-8'),
-                                parser=etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8'))
+        response = self._request('POST', urljoin(self.host, r"Web%20Client/Share/CreateFileShare.xml"),
+                                 data=payload, params=params)
+        response.raise_for_status()
+        root = _parse_xml(response.text)
         return {"url": unquote(root.find("./ShareURL").text),  # ShareURL Encoded
                 "token": root.find("./ShareToken").text}
 
-    def _upload_files(self, files: [str], token: str):
-        """Uploads the files to the previously created file share."""
-        params = {
-            'Command': 'UploadFileShare',
-            'ShareToken': token,
-            'IsVirtual': 0,
-            'CsrfToken': self.csrf_token
-        }
-        for index, file in enumerate(files):
-            params['TransferID'] = index + 1
-            params['File'] = quote(os.path.split(file)[-1])
-            self.session.post(urljoin(self.host,
-                                      fr"Web%20Client/Share/MultipleFileUploadResult.htm"),
-                              files={"file": open(file, 'rb')}, params=params)
+    def _upload_files(self, files: list, token: str, max_workers: int = 1, chunk_size: int = 1024 * 1024,
+                      progress=None):
+        """
+        Uploads the files to the previously created file share.
+        :param files: The files to upload; each keeps its position in the list as its TransferID.
+        :param token: The share token of the file share.
+        :param max_workers: How many files to upload at once.
+        :param chunk_size: How many bytes of each file to read at a time.
+        :param progress: An optional callable taking (file, bytes_sent, total_bytes). total_bytes is None for
+            directories and generators.
+        :raises UploadError: If any file failed to upload. The remaining files are still uploaded.
+        """
+        if max_workers > 1:
+            self._resize_connection_pool(max_workers)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [(file, executor.submit(self._upload_file, file=file, token=token, transfer_id=index + 1,
+                                                  chunk_size=chunk_size, progress=progress))
+                           for index, file in enumerate(files)]
+            failures = {source_label(file): future.exception() for file, future in futures if future.exception()}
+        else:
+            failures = {}
+            for index, file in enumerate(files):
+                try:
+                    self._upload_file(file=file, token=token, transfer_id=index + 1, chunk_size=chunk_size,
+                                      progress=progress)
+                except Exception as exc:
+                    failures[source_label(file)] = exc
+
+        if failures:
+            raise UploadError(failures)
+
+    def _upload_file(self, file, token: str, transfer_id: int, chunk_size: int = 1024 * 1024, progress=None):
+        """Streams a single file, directory or in-memory source to the previously created file share."""
+        callback = (lambda sent, total: progress(file, sent, total)) if progress else None
+        with MultipartFileStream(file, chunk_size=chunk_size, progress=callback) as body:
+            params = {
+                'Command': 'UploadFileShare',
+                'ShareToken': token,
+                'IsVirtual': 0,
+                'CsrfToken': self.csrf_token,
+                'TransferID': transfer_id,
+                'File': quote(body.filename)
+            }
+            response = self._request('POST', urljoin(self.host, fr"Web%20Client/Share/MultipleFileUploadResult.htm"),
+                                     data=body, headers={'Content-Type': body.content_type}, params=params)
+        response.raise_for_status()
+
+    def _resize_connection_pool(self, size: int):
+        """Makes sure the session keeps enough connections to the host open for the given number of threads."""
+        scheme = urlsplit(self.host).scheme
+        adapter = self.session.get_adapter(self.host)
+        if getattr(adapter, '_pool_maxsize', 0) < size:
+            self.session.mount(f"{scheme}://", HTTPAdapter(pool_connections=size, pool_maxsize=size))
 
     def cancel_file_share(self, share_token: str):
         """Invalidates a file share."""
@@ -159,9 +558,9 @@ class Client:
             'ShareToken': share_token,
             'Sync': int(time.time())
         }
-        response = self.session.post(urljoin(self.host, fr"Web%20Client/Result.xml"), params=params)
-        root = etree.fromstring(response.text.encode('utf-8'),
-                                parser=etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8'))
+        response = self._request('POST', urljoin(self.host, fr"Web%20Client/Result.xml"), params=params)
+        self.share_info_cache.pop(share_token)
+        root = _parse_xml(response.text)
         return root.find("./ResultText").text
 
     def list_file_shares(self, count: int = 10):
@@ -179,36 +578,68 @@ class Client:
             'Command': 'ListFileShares',
             'Sync': int(time.time())
         }
-        response = self.session.post(urljoin(self.host, fr"Web%20Client/Share/ListFileShares.xml"), data=payload,
-                                     params=params)
-        root = etree.fromstring(response.text.encode('utf-8'),
-                                parser=etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8'))
-        share_results = root.findall("./share")
-        notification_status = {
-            '0': 'Pending',
-            '1': 'Sent',
-            '2': 'Error Sending',
-            '3': 'Downloaded',
-            '4': 'Received',
-            '5': 'Expired'
-        }
+        response = self._request('POST', urljoin(self.host, fr"Web%20Client/Share/ListFileShares.xml"), data=payload,
+                                 params=params)
+        root = _parse_xml(response.text)
+        return [_parse_file_share(datum) for datum in root.findall("./share")]
 
-        file_shares = []
-        for datum in share_results:
-            file_shares.append({
-                "share_token": datum.find("./ShareToken").text,
-                "has_password": True if datum.find("./HasPassword").text == '1' else False,
-                "date_created": datetime.fromtimestamp(int(datum.find("./DateCreated").text)).strftime("%m/%d/%Y"),
-                "message_subject": unquote(datum.find("./MsgSubject").text),
-                "first_recipient": datum.find("./FirstRecipient").text,
-                "number_of_recipients": datum.find("./NumRecipients").text,
-                "notification_status": notification_status[datum.find(".//NotificationStatus").text],
-                "total_file_size": datum.find("./TotalFileSize").text,
-                "number_of_files": datum.find("./NumFiles").text,
-                "date_of_expiration": datetime.fromtimestamp(int(datum.find("./DateExpiration").text)).strftime("%m/%d/%Y")
-            })
+    def iter_file_shares(self, page_size: int = 100, prefetch: bool = True):
+        """
+        Iterates over every file share, requesting them from MFT one page at a time.
+        :param page_size: How many file shares to request at once.
+        :param prefetch: Whether to request the next page while the current one is being consumed.
+        :return: A generator of FileShare.
+        :raises requests.HTTPError: If a page fails, rather than ending early as if the list were complete.
+        :raises ConnectionRefusedError: If MFT turns the session away even after logging in again.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1.")
+        if not prefetch:
+            start = 0
+            while True:
+                page = self._list_file_share_page(start=start, count=page_size)
+                yield from page
+                if len(page) < page_size:
+                    return
+                start += page_size
 
-        return file_shares
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._list_file_share_page, start=0, count=page_size)
+            start = 0
+            while True:
+                page = future.result()
+                start += page_size
+                if len(page) == page_size:
+                    future = executor.submit(self._list_file_share_page, start=start, count=page_size)
+                yield from page
+                if len(page) < page_size:
+                    return
+
+    def _list_file_share_page(self, start: int, count: int) -> [FileShare]:
+        """Requests a page of file shares and parses it as it is read off the connection."""
+        payload = {
+            'ShareType': 1,
+            'NumShares': count,
+            'StartPos': start
+        }
+        params = {
+            'Command': 'ListFileShares',
+            'Sync': int(time.time())
+        }
+        with self._request('POST', urljoin(self.host, fr"Web%20Client/Share/ListFileShares.xml"), data=payload,
+                           params=params, stream=True) as response:
+            # A failed page has no shares in it, which would otherwise read as the end of the list.
+            if self._is_rejected(response):
+                raise ConnectionRefusedError("MFT turned the session away while listing file shares.")
+            response.raise_for_status()
+            response.raw.decode_content = True
+            page = []
+            for _, datum in etree.iterparse(response.raw, events=('end',), tag='share', recover=True):
+                page.append(_parse_file_share_record(datum))
+                datum.clear()
+                while datum.getprevious() is not None:
+                    del datum.getparent()[0]
+            return page
 
     def send_file_share_invitation_email(self, share_token: str, password: str = None):
         """Sends an email to the recipients with a link to the file share."""
@@ -218,52 +649,46 @@ class Client:
             'IncludesPasswordInEmail': 1 if password else 0,
             'Password': password if password else ""
         }
-        response = self.session.post(self.host, params=params)
-        root = etree.fromstring(response.text.encode('utf-8'),
-                                parser=etree.XMLParser(ns_clean=True, recover=True, encoding='utf-8'))
+        response = self._request('POST', self.host, params=params)
+        response.raise_for_status()
+        root = _parse_xml(response.text)
         return root.find("./ResultText").text
 
-    def get_file_share_info(self, share_token: str):
+    def get_file_share_info(self, share_token: str, use_cache: bool = False) -> dict:
+        """
+        Gets the details of a file share and the files in it.
+        :param share_token: The share token of the file share.
+        :param use_cache: Whether to return the cached details if they were fetched recently.
+        :return: A dict of the file share's details.
+        """
+        if use_cache:
+            info = self.share_info_cache.get(share_token)
+            if info is not None:
+                return copy.deepcopy(info)
+
         params = {
             'Command': 'FileShareInfo',
             'ShareToken': share_token
         }
-        response = self.session.get(os.path.join(self.host, "Web%20Client/Share/ShareDetails.htm"), params=params)
-        # subtext = re.findall(r"(?<=var HISTORY_ITEMS_PER_PAGE\=)[\w\W]+(?=;var sDLIconPath=)", response.text)[0]
-        #
-        # comments = re.findall(r"(?<=g_sShareComment=decodeURIComponent\(\")[A-Za-z.\-%0-9]+(?=\"\))", subtext)
-        # recipients = re.findall(r"(?<=g_sShareGuest=decodeURIComponent\(\")[A-Za-z.\-%0-9]+(?=\"\))", subtext)
-        # password_hash = re.findall(r"(?<=g_sPassword=\")[A-Za-z.\-%0-9]+(?=\";)", subtext)
-        #
-        # notification_status = {
-        #     '0': 'Pending',
-        #     '1': 'Sent',
-        #     '2': 'Error Sending',
-        #     '3': 'Downloaded',
-        #     '4': 'Received',
-        #     '5': 'Expired'
-        # }
-        #
-        # # TODO: Capture file data
-        # # count = 1
-        # # files = []
-        # # file_data = re.findall(rf"(?<=id=\"sharerow{count}\">)[\w\W]+(?=<\/div>)")
-        # # for each in file_data:
-        # #     datum = {
-        # #         'file_name'
-        # #     }
-        #
-        #
-        # result = {
-        #     'share_date': datetime.fromtimestamp(int(re.findall(r"(?<=g_sShareDate=GetLongDateTime\()[A-Za-z.\-%0-9]+(?=\))", subtext)[0])),
-        #     'subject': unquote(re.findall(r"(?<=g_sShareSubject=decodeURIComponent\(\")[A-Za-z.\-%0-9]+(?=\"\))", subtext)[0]),
-        #     'comments': "No comments added" if not comments else comments[0],
-        #     'recipients': "Undisclosed recipients" if not recipients else recipients[0],
-        #     'share_status': notification_status[re.findall(r"(?<=g_sShareStatus=)[0-9](?=;)", subtext)[0]],
-        #     'password_protected': False if not password_hash else True,
-        #     'expire_date': datetime.fromtimestamp(int(re.findall(r"(?<=g_nShareExpires=parseInt\(\")[A-Za-z.\-%0-9]+(?=\"\))", subtext)[0])),
-        #     'share_owner': re.findall(r"(?<=g_sShareOwnerName=decodeURIComponent\(\")[A-Za-z.\-%0-9]+(?=\"\))", subtext)[0],
-        #     'share_url': urljoin(self.host, f"?shareToken={share_token}"),
-        #     'files': []
-        # }
-        # return result
\ No newline at end of file
+        response = self._request('GET', urljoin(self.host, "Web%20Client/Share/ShareDetails.htm"), params=params)
+        response.raise_for_status()
+        info = _parse_share_details(response.text, share_url=urljoin(self.host, f"?shareToken={share_token}"))
+        # Callers get their own copy, so changing it doesn't change what the next cached read returns.
+        self.share_info_cache.set(share_token, copy.deepcopy(info))
+        return info
+
+    def get_file_share_infos(self, share_tokens: [str], max_workers: int = 8, use_cache: bool = True) -> dict:
+        """
+        Gets the details of many file shares at once.
+        :param share_tokens: The share tokens of the file shares.
+        :param max_workers: How many file shares to fetch at once.
+        :param use_cache: Whether to reuse details fetched recently instead of fetching them again.
+        :return: A dict mapping each share token to its details, or to the exception raised while fetching them.
+        """
+        share_tokens = list(dict.fromkeys(share_tokens))
+        self._resize_connection_pool(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {share_token: executor.submit(self.get_file_share_info, share_token=share_token,
+                                                    use_cache=use_cache)
+                       for share_token in share_tokens}
+        return {share_token: future.exception() or future.result() for share_token, future in futures.items()}
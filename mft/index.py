@@ -0,0 +1,127 @@
+import sqlite3
+import time
+
+from .client import FileShare
+
+
+class ShareIndex:
+    """
+    A local SQLite copy of the file share list, keyed by share token, that can be queried without contacting MFT.
+    Keep it up to date with sync().
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS shares (
+            share_token TEXT PRIMARY KEY,
+            has_password INTEGER NOT NULL,
+            date_created INTEGER NOT NULL,
+            message_subject TEXT,
+            first_recipient TEXT,
+            number_of_recipients INTEGER NOT NULL,
+            notification_status TEXT NOT NULL,
+            total_file_size INTEGER NOT NULL,
+            number_of_files INTEGER NOT NULL,
+            date_of_expiration INTEGER NOT NULL,
+            last_seen REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS shares_notification_status ON shares (notification_status);
+        CREATE INDEX IF NOT EXISTS shares_date_of_expiration ON shares (date_of_expiration);
+    """
+    _COLUMNS = ", ".join(FileShare._fields)
+    _UPSERT = f"""
+        INSERT INTO shares ({_COLUMNS}, last_seen) VALUES ({", ".join("?" * (len(FileShare._fields) + 1))})
+        ON CONFLICT (share_token) DO UPDATE SET
+            {", ".join(f"{field} = excluded.{field}" for field in FileShare._fields[1:])},
+            last_seen = excluded.last_seen
+        WHERE {" OR ".join(f"{field} IS NOT excluded.{field}" for field in FileShare._fields[1:])}
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Opens (creating if needed) a share index.
+        :param path: Where to keep the SQLite database. Defaults to an in-memory database.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self._SCHEMA)
+
+    def close(self):
+        """Closes the database."""
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM shares").fetchone()[0]
+
+    def sync(self, client, full: bool = False, page_size: int = 100) -> int:
+        """
+        Updates the index from MFT.
+
+        The order ListFileShares lists file shares in isn't documented, so an incremental sync reads it off each page.
+        If a page lists the newest file shares first and none of them changed, the pages after it only hold older file
+        shares and the sync stops there. If file shares are listed oldest first, new ones come last, so the whole list
+        is read. An incremental sync that stops early doesn't see status changes on the older file shares it skipped,
+        so run a full sync now and then to pick those up. A full sync always reads every file share, and it also
+        drops the ones MFT no longer lists.
+        :param client: A logged in Client.
+        :param full: Whether to read every file share instead of stopping early.
+        :param page_size: How many file shares to request at once.
+        :return: The number of file shares that were added, changed or removed.
+        :raises requests.HTTPError: If a page of the listing fails. Nothing from the sync is kept, so a listing that
+            was cut short never drops file shares it didn't get to.
+        """
+        started = time.time()
+        changes = 0
+        page = []
+        with self.connection:
+            for share in client.iter_file_shares(page_size=page_size):
+                page.append(share)
+                if len(page) == page_size:
+                    changed = self._upsert(page, seen=started, touch=full)
+                    changes += changed
+                    if not full and not changed and page[0].date_created > page[-1].date_created:
+                        break
+                    page = []
+            else:
+                changes += self._upsert(page, seen=started, touch=full)
+                # Only a listing that ran to the end shows which file shares MFT no longer lists.
+                if full:
+                    changes += self.connection.execute("DELETE FROM shares WHERE last_seen < ?",
+                                                       (started,)).rowcount
+        return changes
+
+    def _upsert(self, shares: [FileShare], seen: float, touch: bool) -> int:
+        """
+        Writes a page of file shares and returns how many of them were new or changed.
+        :param touch: Whether to mark the unchanged file shares as seen too.
+        """
+        before = self.connection.total_changes
+        self.connection.executemany(self._UPSERT, ((*share, seen) for share in shares))
+        changed = self.connection.total_changes - before
+        if touch:
+            self.connection.executemany("UPDATE shares SET last_seen = ? WHERE share_token = ?",
+                                        ((seen, share.share_token) for share in shares))
+        return changed
+
+    def get(self, share_token: str) -> FileShare:
+        """Returns the file share with the given token, or None if it is not in the index."""
+        shares = self.query("share_token = ?", (share_token,))
+        return shares[0] if shares else None
+
+    def with_status(self, notification_status: str) -> [FileShare]:
+        """Returns the file shares with the given notification status, such as 'Pending' or 'Downloaded'."""
+        return self.query("notification_status = ?", (notification_status,))
+
+    def not_downloaded(self) -> [FileShare]:
+        """Returns the file shares that have not been downloaded or received yet."""
+        return self.query("notification_status NOT IN ('Downloaded', 'Received')")
+
+    def expiring_between(self, start: int, end: int) -> [FileShare]:
+        """Returns the file shares that expire between the two Unix timestamps, soonest first."""
+        return self.query("date_of_expiration BETWEEN ? AND ? ORDER BY date_of_expiration", (start, end))
+
+    def query(self, where: str = "1", parameters: tuple = ()) -> [FileShare]:
+        """
+        Returns the file shares matching an SQL condition.
+        :param where: The body of the WHERE clause, optionally followed by ORDER BY or LIMIT.
+        :param parameters: The values for any placeholders in the condition.
+        """
+        rows = self.connection.execute(f"SELECT {self._COLUMNS} FROM shares WHERE {where}", parameters)
+        return [FileShare(*row[:1], bool(row[1]), *row[2:]) for row in rows]
@@ -0,0 +1,84 @@
+import threading
+from collections import namedtuple, defaultdict
+
+RequestEvent = namedtuple('RequestEvent', ['command', 'method', 'url', 'status_code', 'elapsed', 'bytes_sent',
+                                           'bytes_received'])
+RequestEvent.__doc__ = """
+A completed request to MFT. elapsed is in seconds and includes sending the request body. bytes_received is 0 for a
+streamed response that MFT sends without a Content-Length.
+"""
+
+
+class Instrumentation:
+    """
+    Receives a callback for every request a Client makes and for notable events such as logins and retries.
+    Subclass it and override the callbacks to export them, then pass it to Client as instrumentation.
+    """
+
+    def on_request(self, event: RequestEvent):
+        """Called after every response from MFT."""
+
+    def on_event(self, name: str, **fields):
+        """
+        Called for events other than requests: 'login', 'session_restored', 'relogin', 'csrf_refresh' and 'retry'.
+        A 'retry' comes with the command being retried, the error and the attempt number.
+        """
+
+
+class MetricsRecorder(Instrumentation):
+    """Aggregates latency histograms, transfer sizes and event counts per command in memory."""
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forgets everything recorded so far."""
+        with self._lock:
+            self._commands = defaultdict(lambda: {
+                'count': 0,
+                'errors': 0,
+                'retries': 0,
+                'total_seconds': 0.0,
+                'max_seconds': 0.0,
+                'bytes_sent': 0,
+                'bytes_received': 0,
+                'histogram': [0] * len(self.BUCKETS)
+            })
+            self._events = defaultdict(int)
+
+    def on_request(self, event: RequestEvent):
+        with self._lock:
+            stats = self._commands[event.command]
+            stats['count'] += 1
+            stats['errors'] += event.status_code >= 400
+            stats['total_seconds'] += event.elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], event.elapsed)
+            stats['bytes_sent'] += event.bytes_sent
+            stats['bytes_received'] += event.bytes_received
+            stats['histogram'][next(i for i, bound in enumerate(self.BUCKETS) if event.elapsed <= bound)] += 1
+
+    def on_event(self, name: str, **fields):
+        with self._lock:
+            self._events[name] += 1
+            if name == 'retry' and fields.get('command'):
+                self._commands[fields['command']]['retries'] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns what has been recorded so far.
+        :return: A dict with 'commands', mapping each command to its counts (including retries), latency histogram
+            (keyed by each bucket's upper bound in seconds) and upload throughput in bytes per second, and 'events',
+            mapping each event to a count.
+        """
+        with self._lock:
+            commands = {}
+            for command, stats in self._commands.items():
+                commands[command] = dict(stats,
+                                         mean_seconds=stats['total_seconds'] / stats['count']
+                                         if stats['count'] else 0.0,
+                                         throughput=stats['bytes_sent'] / stats['total_seconds']
+                                         if stats['total_seconds'] else 0.0,
+                                         histogram=dict(zip(self.BUCKETS, stats['histogram'])))
+            return {'commands': commands, 'events': dict(self._events)}
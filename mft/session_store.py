@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import tempfile
+
+
+class SessionStore:
+    """
+    Somewhere to keep an authenticated MFT session between processes.
+    Subclass it and implement load, save and clear to keep sessions somewhere other than the local disk.
+    """
+
+    def load(self, key: str) -> dict:
+        """Returns the session saved under the key, or None if there isn't one."""
+        raise NotImplementedError
+
+    def save(self, key: str, state: dict):
+        """Saves a session, a JSON serializable dict holding its cookies and CSRF token, under the key."""
+        raise NotImplementedError
+
+    def clear(self, key: str):
+        """Forgets the session saved under the key."""
+        raise NotImplementedError
+
+
+class FileSessionStore(SessionStore):
+    """Keeps each session in its own JSON file, readable only by the current user."""
+
+    def __init__(self, directory: str = os.path.join(os.path.expanduser("~"), ".mft", "sessions")):
+        """
+        :param directory: Where to keep the session files. Created if it doesn't exist.
+        """
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + ".json")
+
+    def load(self, key: str) -> dict:
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key: str, state: dict):
+        # Write to a temporary file first so other processes never read a half written session.
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, 'w') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def clear(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
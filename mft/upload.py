@@ -0,0 +1,251 @@
+import asyncio
+import io
+import os
+import uuid
+import zipfile
+
+
+def source_name(source) -> str:
+    """
+    Returns the name a source is uploaded as.
+    :param source: A path to a file or directory, a (filename, data) tuple, or a file-like object with a name.
+    """
+    if isinstance(source, tuple):
+        if isinstance(source[1], str):
+            raise TypeError(f"The data for {source[0]} is a str; encode it to bytes, or pass a path on its own.")
+        return source[0]
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        name = os.path.basename(os.path.normpath(path))
+        return name + ".zip" if os.path.isdir(path) else name
+    if hasattr(source, 'read') and isinstance(getattr(source, 'name', None), str):
+        return os.path.basename(source.name)
+    raise TypeError(f"Can't tell what to name {source!r}; pass it as a (filename, data) tuple instead.")
+
+
+def source_label(source) -> str:
+    """Returns a short, hashable description of a source for error messages, even for a source that can't be named."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    try:
+        return source_name(source)
+    except TypeError:
+        return repr(source)
+
+
+def source_rewinder(source):
+    """
+    Returns a callable that puts a source back where it is now so it can be read again, or None if it can't be read
+    again. Paths and buffers are read from the start every time; only seekable file-like objects need moving back.
+    """
+    data = source[1] if isinstance(source, tuple) else source
+    if isinstance(data, (str, os.PathLike, bytes, bytearray, memoryview)):
+        return lambda: None
+    if hasattr(data, 'seekable') and data.seekable():
+        start = data.tell()
+        return lambda: data.seek(start)
+    return None
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """An unseekable file that collects what ZipFile writes until the stream takes it."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+def _zip_directory(path: str, chunk_size: int):
+    """Yields a zip of the directory as it is written, never holding more than about one chunk of it at a time."""
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for directory, subdirectories, filenames in os.walk(path):
+            subdirectories.sort()
+            if not subdirectories and not filenames and directory != path:
+                archive.writestr(zipfile.ZipInfo.from_file(directory, os.path.relpath(directory, path)), b"")
+            for filename in sorted(filenames):
+                file_path = os.path.join(directory, filename)
+                info = zipfile.ZipInfo.from_file(file_path, os.path.relpath(file_path, path))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(file_path, 'rb') as source, \
+                        archive.open(info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as destination:
+                    while True:
+                        chunk = source.read(chunk_size)
+                        if not chunk:
+                            break
+                        destination.write(chunk)
+                        if buffer.size >= chunk_size:
+                            yield buffer.take()
+                if buffer.size >= chunk_size:
+                    yield buffer.take()
+    yield buffer.take()
+
+
+def _read_chunks(file, chunk_size: int):
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _buffer_chunks(data, chunk_size: int):
+    view = memoryview(data).cast('B')
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+class MultipartFileStream:
+    """
+    A multipart/form-data body for a single upload that is read from its source as it is sent.
+
+    Only one chunk of the source is held in memory at a time, so memory use stays flat no matter how large it is.
+    The source can be a path to a file, a path to a directory (sent as a zip that is built as it uploads), a file-like
+    object, a bytes-like buffer, or an iterable of bytes. Pass it as the ``data`` of a ``requests`` call along with
+    ``content_type`` as the Content-Type header, or iterate it with ``async for`` to stream it from an asyncio HTTP
+    client without blocking the event loop on reads.
+    """
+
+    def __init__(self, source, field_name: str = "file", chunk_size: int = 1024 * 1024, progress=None):
+        """
+        :param source: What to upload: a path, a file-like object with a name, or a (filename, data) tuple where data
+            is a file-like object, a bytes-like buffer or an iterable of bytes.
+        :param field_name: The name of the form field the upload is sent as.
+        :param chunk_size: How many bytes to read from the source at a time.
+        :param progress: An optional callable taking (bytes_sent, total_bytes), called after every chunk. total_bytes is
+            None if the size of the source isn't known ahead of time.
+        """
+        self.filename = source_name(source)
+        self._data = source[1] if isinstance(source, tuple) else source
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        filename = self.filename.replace('"', '%22')
+        self._preamble = (f"--{self.boundary}\r\n"
+                          f"Content-Disposition: form-data; name=\"{field_name}\"; filename=\"{filename}\"\r\n"
+                          f"Content-Type: application/octet-stream\r\n\r\n").encode('utf-8')
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode('utf-8')
+        self._start = self._data.tell() if hasattr(self._data, 'seekable') and self._data.seekable() else None
+        source_size = self._source_size()
+        # requests reads the body's length from a len attribute, and sends it chunked when that is None.
+        self.len = None if source_size is None else len(self._preamble) + source_size + len(self._epilogue)
+        self._file = None
+        self._parts = None
+        self._pending = b""
+        self.bytes_sent = 0
+
+    def _source_size(self):
+        """Returns the size of the source in bytes, or None if it can't be known without reading it."""
+        data = self._data
+        if isinstance(data, (str, os.PathLike)):
+            return None if os.path.isdir(data) else os.path.getsize(data)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return memoryview(data).nbytes
+        if self._start is not None:
+            end = data.seek(0, io.SEEK_END)
+            data.seek(self._start)
+            return end - self._start
+        return None
+
+    def _chunks(self):
+        """Returns an iterator over the source's bytes."""
+        data = self._data
+        if isinstance(data, (str, os.PathLike)):
+            if os.path.isdir(data):
+                return _zip_directory(data, self.chunk_size)
+            self._file = open(data, 'rb', buffering=self.chunk_size)
+            return _read_chunks(self._file, self.chunk_size)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return _buffer_chunks(data, self.chunk_size)
+        if hasattr(data, 'read'):
+            return _read_chunks(data, self.chunk_size)
+        return iter(data)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            chunk = await loop.run_in_executor(None, self.read, self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read(self, size: int = -1) -> bytes:
+        """Returns up to ``size`` bytes of the body, or the next chunk if no size is given."""
+        if size is None or size < 0:
+            size = self.chunk_size
+        if self._parts is None:
+            self._parts = [self._preamble, self._chunks(), self._epilogue]
+
+        while self._parts:
+            part = self._parts[0]
+            if isinstance(part, bytes):
+                chunk, rest = part[:size], part[size:]
+                if rest:
+                    self._parts[0] = rest
+                else:
+                    self._parts.pop(0)
+            else:
+                if not self._pending:
+                    pending = next(part, None)
+                    if pending is None:
+                        self._parts.pop(0)
+                        self.close()
+                        continue
+                    # Slicing a memoryview doesn't copy, so serving a large chunk in small reads stays cheap.
+                    self._pending = memoryview(pending).cast('B')
+                    continue
+                chunk, self._pending = bytes(self._pending[:size]), self._pending[size:]
+            self.bytes_sent += len(chunk)
+            if self.progress:
+                self.progress(self.bytes_sent, self.len)
+            return chunk
+        return b""
+
+    def rewind(self):
+        """Starts the body over from the beginning so it can be sent again."""
+        if not isinstance(self._data, (str, os.PathLike, bytes, bytearray, memoryview)) and self._start is None:
+            raise ValueError(f"{self.filename} can't be sent again because its source can't be rewound.")
+        self.close()
+        if self._start is not None:
+            self._data.seek(self._start)
+        self._parts = None
+        self._pending = b""
+        self.bytes_sent = 0
+
+    def close(self):
+        """Closes the file the stream opened, if any. File-like objects passed in are left open."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._parts and not isinstance(self._parts[0], bytes) and hasattr(self._parts[0], 'close'):
+            self._parts[0].close()
@@ -12,6 +12,7 @@ setup(
     install_requires=['requests>=2.25.1',
                       'urllib3>=1.26.3',
                       ],
+    extras_require={'async': ['httpx>=0.23']},
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from benchmarks.mock_server import MockServer
+from mft import AsyncClient
+
+httpx = pytest.importorskip("httpx")
+
+
+@pytest.fixture
+def server():
+    with MockServer(shares=20) as server:
+        yield server
+
+
+async def _client(server: MockServer) -> AsyncClient:
+    client = AsyncClient(server.url)
+    await client.login(username=server.username, password=server.password)
+    return client
+
+
+def test_logs_in_again_when_the_session_expires(server):
+    async def run():
+        async with await _client(server) as client:
+            server.expire_sessions()
+            url = await client.create_file_share(AsyncClient.ShareType.send, files=[("report.csv", b"a,b,c\n")],
+                                                 recipient_addrs=["recipient@example.com"])
+            server.expire_sessions()
+            shares = await client.list_file_shares(count=5)
+            return url, shares
+    url, shares = asyncio.run(run())
+    assert "shareToken=" in url
+    assert len(shares) == 5
+
+
+def test_raises_when_the_session_is_rejected_again(server):
+    async def run():
+        async with await _client(server) as client:
+            server.password = "changed"
+            server.expire_sessions()
+            await client.list_file_shares()
+    with pytest.raises(ConnectionRefusedError):
+        asyncio.run(run())
+
+
+def test_raises_on_error_statuses(server):
+    server.failing_pages.add(0)
+
+    async def run():
+        async with await _client(server) as client:
+            await client.list_file_shares()
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
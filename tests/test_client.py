@@ -0,0 +1,134 @@
+import time
+import warnings
+from datetime import datetime
+
+import pytest
+import requests
+
+from benchmarks.mock_server import MockServer
+from mft import Client, MetricsRecorder, UploadError
+from mft.client import _parse_share_details
+
+
+@pytest.fixture
+def server():
+    with MockServer(shares=300) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    warnings.simplefilter("ignore")
+    client = Client(server.url)
+    client.login(username=server.username, password=server.password)
+    return client
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_file_shares_lists_every_page(client, server, prefetch):
+    tokens = [share.share_token for share in client.iter_file_shares(page_size=100, prefetch=prefetch)]
+    assert len(tokens) == server.shares == len(set(tokens))
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_file_shares_raises_on_a_failed_page(client, server, prefetch):
+    server.failing_pages.add(100)
+    with pytest.raises(requests.HTTPError):
+        list(client.iter_file_shares(page_size=100, prefetch=prefetch))
+
+
+def test_iter_file_shares_rejects_empty_pages(client):
+    with pytest.raises(ValueError):
+        next(client.iter_file_shares(page_size=0))
+
+
+def _email_jobs(count: int) -> [dict]:
+    return [{'files': [("report.csv", b"a,b,c\n")], 'recipient_addrs': ["recipient@example.com"]}
+            for _ in range(count)]
+
+
+def test_create_file_shares_starts_without_being_iterated(client, server):
+    before = server.requests
+    results = client.create_file_shares(_email_jobs(6))
+    deadline = time.monotonic() + 10
+    while server.requests - before < 6 * 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.requests - before == 6 * 3
+    assert all(result.error is None for result in results)
+
+
+def test_closing_create_file_shares_finishes_started_jobs(client, server):
+    server.latency = 0.02
+    before = server.requests
+    results = client.create_file_shares(_email_jobs(12), create_workers=2, upload_workers=2, email_workers=2)
+    assert next(results).error is None
+    results.close()
+    # Every file share that was created was also uploaded to and sent; the rest were never created.
+    sent = server.requests - before
+    assert sent % 3 == 0 and 3 <= sent < 12 * 3
+
+
+def test_parse_share_details():
+    html = ('<script>var HISTORY_ITEMS_PER_PAGE=10;g_sShareSubject=decodeURIComponent("Q3%20report");'
+            'g_sShareComment=decodeURIComponent("");g_sShareGuest=decodeURIComponent("a%40example.com");'
+            'g_sPassword="5f4dcc3b";g_sShareStatus=3;g_sShareDate=GetLongDateTime(1600000000);'
+            'g_nShareExpires=parseInt("1602592000");g_sShareOwnerName=decodeURIComponent("jaguilar");'
+            'var sDLIconPath="/icons/download.png";</script>')
+    assert _parse_share_details(html, share_url="https://mft/?shareToken=abc") == {
+        'share_date': datetime.fromtimestamp(1600000000),
+        'subject': "Q3 report",
+        'comments': "No comments added",
+        'recipients': "a@example.com",
+        'share_status': 'Downloaded',
+        'password_protected': True,
+        'expire_date': datetime.fromtimestamp(1602592000),
+        'share_owner': "jaguilar",
+        'share_url': "https://mft/?shareToken=abc"
+    }
+
+
+def test_parse_share_details_rejects_other_pages():
+    with pytest.raises(ValueError):
+        _parse_share_details("<html><body>Login</body></html>", share_url="https://mft/?shareToken=abc")
+
+
+def test_upload_error_names_the_file_share(client):
+    def broken():
+        yield b"a,b"
+        raise OSError("disk error")
+
+    with pytest.raises(UploadError) as info:
+        client.create_file_share(Client.ShareType.send, files=[("good.csv", b"a,b,c\n"), ("bad.csv", broken())],
+                                 max_workers=2)
+    assert list(info.value.failures) == ["bad.csv"]
+    assert info.value.token and info.value.token in info.value.url
+
+
+def test_bad_sources_are_rejected_before_the_share_is_created(client, server):
+    before = server.requests
+    with pytest.raises(TypeError):
+        client.create_file_share(Client.ShareType.send, files=[("rows.csv", "a,b,c")])
+    assert server.requests == before
+
+
+def test_retries_are_counted_per_command(server):
+    warnings.simplefilter("ignore")
+    metrics = MetricsRecorder()
+    client = Client(server.url, instrumentation=metrics)
+    client.login(username=server.username, password=server.password)
+    upload_file = client._upload_file
+    attempts = []
+
+    def flaky_upload(**kwargs):
+        attempts.append(kwargs['transfer_id'])
+        if len(attempts) == 1:
+            raise requests.ConnectionError("connection dropped")
+        upload_file(**kwargs)
+    client._upload_file = flaky_upload
+
+    results = list(client.create_file_shares([{'files': [("report.csv", b"a,b,c\n")]}], backoff=0))
+    assert results[0].error is None
+    snapshot = metrics.snapshot()
+    assert snapshot['events']['retry'] == 1
+    assert snapshot['commands']['UploadFileShare']['retries'] == 1
+    assert snapshot['commands']['CreateFileShare']['retries'] == 0
@@ -0,0 +1,74 @@
+import warnings
+
+import pytest
+import requests
+
+from benchmarks.mock_server import MockServer
+from mft import Client, ShareIndex
+
+
+@pytest.fixture(params=[False, True], ids=["oldest_first", "newest_first"])
+def server(request):
+    with MockServer(shares=500, newest_first=request.param) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        client = Client(server.url)
+        client.login(username=server.username, password=server.password)
+    return client
+
+
+def test_incremental_sync_picks_up_new_shares(server, client):
+    index = ShareIndex()
+    assert index.sync(client, page_size=50) == 500
+
+    server.shares = 550
+    assert index.sync(client, page_size=50) == 50
+    assert len(index) == 550
+    assert index.get("share00000549") is not None
+
+
+def test_status_changes_on_older_shares(server, client):
+    index = ShareIndex()
+    index.sync(client, page_size=50)
+    assert index.get("share00000102").notification_status == 'Pending'
+
+    server.statuses[102] = 3
+    if server.newest_first:
+        # The newest page is unchanged, so an incremental sync stops before it reaches the older file share.
+        assert index.sync(client, page_size=50) == 0
+        assert index.get("share00000102").notification_status == 'Pending'
+        assert index.sync(client, full=True, page_size=50) == 1
+    else:
+        assert index.sync(client, page_size=50) == 1
+    assert index.get("share00000102").notification_status == 'Downloaded'
+    assert "share00000102" not in {share.share_token for share in index.not_downloaded()}
+
+
+def test_full_sync_drops_removed_shares(server, client):
+    index = ShareIndex()
+    index.sync(client, page_size=50)
+
+    server.shares = 450
+    assert index.sync(client, full=True, page_size=50) == 50
+    assert len(index) == 450
+
+
+def test_failed_page_keeps_the_index(server, client):
+    index = ShareIndex()
+    index.sync(client, page_size=50)
+    server.statuses[102] = 3
+
+    server.failing_pages.add(100)
+    with pytest.raises(requests.HTTPError):
+        index.sync(client, full=True, page_size=50)
+    assert len(index) == 500
+    assert index.get("share00000102").notification_status == 'Pending'
+
+    server.failing_pages.clear()
+    assert index.sync(client, full=True, page_size=50) == 1
+    assert len(index) == 500
@@ -0,0 +1,87 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from mft.upload import MultipartFileStream, source_name, source_rewinder
+
+
+def _payload(stream: MultipartFileStream, read_size: int = None) -> bytes:
+    """Reads the whole body and strips the multipart wrapper from around the source's bytes."""
+    if read_size:
+        chunks = iter(lambda: stream.read(read_size), b"")
+    else:
+        chunks = iter(stream)
+    body = b"".join(chunks)
+    assert stream.bytes_sent == len(body)
+    if stream.len is not None:
+        assert stream.len == len(body)
+    header, _, rest = body.partition(b"\r\n\r\n")
+    assert header.startswith(f"--{stream.boundary}\r\n".encode('utf-8'))
+    epilogue = f"\r\n--{stream.boundary}--\r\n".encode('utf-8')
+    assert rest.endswith(epilogue)
+    return rest[:-len(epilogue)]
+
+
+def test_file_path(tmp_path):
+    path = tmp_path / "data.bin"
+    data = os.urandom(100000)
+    path.write_bytes(data)
+    with MultipartFileStream(str(path), chunk_size=4096) as stream:
+        assert stream.filename == "data.bin"
+        assert _payload(stream) == data
+
+
+def test_small_reads_of_large_chunks():
+    data = bytes(range(256)) * 1000
+    with MultipartFileStream(("data.bin", data), chunk_size=65536) as stream:
+        assert _payload(stream, read_size=1000) == data
+
+
+def test_directory_round_trips_through_zipfile(tmp_path):
+    (tmp_path / "reports" / "2020").mkdir(parents=True)
+    (tmp_path / "reports" / "empty").mkdir()
+    (tmp_path / "reports" / "summary.txt").write_text("summary")
+    (tmp_path / "reports" / "2020" / "q1.csv").write_bytes(os.urandom(50000))
+    with MultipartFileStream(str(tmp_path / "reports"), chunk_size=1024) as stream:
+        assert stream.filename == "reports.zip"
+        assert stream.len is None
+        archive = zipfile.ZipFile(io.BytesIO(_payload(stream)))
+    assert archive.testzip() is None
+    assert sorted(archive.namelist()) == ["2020/q1.csv", "empty/", "summary.txt"]
+    assert archive.read("summary.txt") == b"summary"
+    assert archive.read("2020/q1.csv") == (tmp_path / "reports" / "2020" / "q1.csv").read_bytes()
+
+
+def test_seekable_file_starts_at_its_offset():
+    data = io.BytesIO(b"header,skip me\nrow1\nrow2\n")
+    data.seek(15)
+    with MultipartFileStream(("rows.csv", data), chunk_size=4) as stream:
+        assert _payload(stream) == b"row1\nrow2\n"
+        stream.rewind()
+        assert _payload(stream) == b"row1\nrow2\n"
+
+
+def test_seekable_file_rewinder():
+    data = io.BytesIO(b"0123456789")
+    data.seek(3)
+    rewind = source_rewinder(("digits.txt", data))
+    data.read()
+    rewind()
+    assert data.read() == b"3456789"
+
+
+def test_generator_cannot_be_rewound():
+    source = ("rows.csv", (row for row in [b"a\n", b"b\n"]))
+    assert source_rewinder(source) is None
+    with MultipartFileStream(source) as stream:
+        assert stream.len is None
+        assert _payload(stream) == b"a\nb\n"
+        with pytest.raises(ValueError):
+            stream.rewind()
+
+
+def test_str_data_is_rejected():
+    with pytest.raises(TypeError):
+        source_name(("rows.csv", "a,b,c"))